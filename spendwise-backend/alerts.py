@@ -0,0 +1,117 @@
+import os
+import time
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from models import db, Expense, Budget, SpendingTotal, Notification
+from extensions import result_cache
+
+# ==========================================
+# BUDGET & EMERGENCY FUND ALERTS (Evaluated on write)
+# ==========================================
+# Each expense write moves one running total (user, month, category) and compares it with
+# that month's budget: 2 indexed lookups per write, no matter how many expenses exist.
+# An alert fires only when a level is crossed (old total below it, new total at/above it).
+# Setting or lowering a budget is checked the same way against the current running total.
+
+# Latency is counted in the result-cache backend (see cache.py) so that, with a shared
+# backend, /admin/alert-stats covers every worker. Buckets show whether it stays flat.
+LATENCY_BUCKETS_MS = (1, 5, 20)
+
+
+def _record_latency(started):
+    us = int((time.perf_counter() - started) * 1_000_000)
+    result_cache.count('alert_evaluations')
+    result_cache.count('alert_total_us', us)
+    bucket = next((f"le_{b}ms" for b in LATENCY_BUCKETS_MS if us <= b * 1000), f"gt_{LATENCY_BUCKETS_MS[-1]}ms")
+    result_cache.count(f"alert_{bucket}")
+
+
+def alert_stats():
+    evaluations, total_us = result_cache.counter('alert_evaluations'), result_cache.counter('alert_total_us')
+    buckets = [f"le_{b}ms" for b in LATENCY_BUCKETS_MS] + [f"gt_{LATENCY_BUCKETS_MS[-1]}ms"]
+    data = {
+        'evaluations': evaluations,
+        'avg_ms': round(total_us / evaluations / 1000, 3) if evaluations else 0,
+        'latency_buckets': {b: result_cache.counter(f"alert_{b}") for b in buckets},
+        'scope': 'all workers' if result_cache.shared else 'this worker only',
+    }
+    if not result_cache.shared: data['pid'] = os.getpid()
+    return data
+
+
+def _num(value):
+    # The frontend posts form values as strings (possibly empty)
+    try: return float(value)
+    except (TypeError, ValueError): return 0.0
+
+
+def _running_total(user_id, month, category):
+    query = SpendingTotal.query.filter_by(user_id=user_id, month=month, category=category).with_for_update()
+    row = query.first()
+    if not row:
+        # First write for this month/category since alerts were added: seed it once from history
+        seed = db.session.query(func.sum(Expense.amount)).filter(Expense.user_id == user_id, Expense.category == category, Expense.date.like(f'{month}%')).scalar() or 0
+        try:
+            with db.session.begin_nested():
+                row = SpendingTotal(user_id=user_id, month=month, category=category, total=seed)
+                db.session.add(row)
+        except IntegrityError:
+            # A concurrent first write created it (and committed) in the meantime: use theirs
+            row = query.first()
+    return row
+
+
+def _budget_alert(user_id, category, month, total, budget, before_pct, after_pct):
+    """Notification for the highest level in (before_pct, after_pct], or None."""
+    for level in sorted(current_app.config.get('BUDGET_ALERT_LEVELS', (80, 100)), reverse=True):
+        if before_pct < level <= after_pct:
+            return Notification(user_id=user_id, kind=f'budget_{level}', message=f"You have used {round(after_pct)}% of your {category} budget for {month} (Rs. {total:.2f} of Rs. {budget:.2f}).")
+    return None
+
+
+def record_expense(user_id, category, date, amount):
+    """Call BEFORE adding (amount > 0) or deleting (amount < 0) the expense. Returns new Notifications."""
+    started = time.perf_counter()
+    amount, month = _num(amount), date[:7]
+    row = _running_total(user_id, month, category)
+    old_total, new_total = row.total, row.total + amount
+    row.total = new_total
+
+    created = []
+    if amount > 0:
+        budget = Budget.query.filter_by(user_id=user_id, category=category, month=month).first()
+        if budget and budget.amount > 0:
+            alert = _budget_alert(user_id, category, month, new_total, budget.amount, old_total / budget.amount * 100, new_total / budget.amount * 100)
+            if alert: created.append(alert)
+    db.session.add_all(created)
+    _record_latency(started)
+    return created
+
+
+def check_budget(user_id, category, month, old_amount, new_amount):
+    """Call when a budget is set/changed. Fires if the new amount puts current spend past a level."""
+    started = time.perf_counter()
+    created = []
+    old_amount, new_amount = _num(old_amount), _num(new_amount)
+    if new_amount > 0:
+        total = _running_total(user_id, month, category).total
+        before_pct = total / old_amount * 100 if old_amount > 0 else 0
+        alert = _budget_alert(user_id, category, month, total, new_amount, before_pct, total / new_amount * 100)
+        if alert: created.append(alert)
+    db.session.add_all(created)
+    _record_latency(started)
+    return created
+
+
+def check_fund(fund, old_current, old_threshold):
+    """Call after updating the EmergencyFund. Fires when the balance drops below alert_threshold."""
+    started = time.perf_counter()
+    created = []
+    threshold, current = _num(fund.alert_threshold), _num(fund.current_amount)
+    was_below = _num(old_threshold) > 0 and _num(old_current) < _num(old_threshold)
+    if threshold > 0 and current < threshold and not was_below:
+        created.append(Notification(user_id=fund.user_id, kind='fund_low', message=f"Your emergency fund is at Rs. {current:.2f}, below your alert threshold of Rs. {threshold:.2f}."))
+    db.session.add_all(created)
+    _record_latency(started)
+    return created
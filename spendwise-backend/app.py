@@ -2,13 +2,13 @@ from flask import Flask
 from flask_cors import CORS
 from config import Config
 from models import db
-from extensions import mail
+from extensions import mail, result_cache
 
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__)
     
     # 1. Load Configuration
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
     
     # 2. Enable CORS (Allows Frontend to talk to Backend)
     # UPDATED: This specific setting fixes the "Preflight" error by allowing all origins
@@ -17,12 +17,17 @@ def create_app():
     # 3. Initialize Extensions
     db.init_app(app)
     mail.init_app(app)
+    result_cache.init_app(app)
     
     # 4. Register Blueprints (Routes)
     from routes import main
     app.register_blueprint(main)
+
+    # 5. Register CLI Commands (flask send-digest)
+    from digest import send_digest_command
+    app.cli.add_command(send_digest_command)
     
-    # 5. Create Tables Automatically
+    # 6. Create Tables Automatically
     # This is the standard way for Flask to ensure tables exist
     with app.app_context():
         db.create_all()
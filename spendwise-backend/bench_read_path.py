@@ -0,0 +1,82 @@
+"""Benchmark: ORM list/export path vs the Core read path (readpath.py).
+
+Usage: python bench_read_path.py [rows ...]   (default: 10000 100000 1000000)
+
+Runs against a throwaway in-memory SQLite database, so it needs no .env / Postgres.
+Reports CPU time per row and peak Python memory per row (tracemalloc) for each path.
+"""
+import csv
+import io
+import sys
+import time
+import tracemalloc
+from flask import Flask
+from sqlalchemy import insert
+from models import db, User, Expense, Income
+from readpath import expense_rows, ledger_rows, to_json_list, EXPENSE_COLS
+
+
+def seed(n):
+    db.session.execute(insert(User), [{'id': 1, 'username': 'bench', 'email': 'bench@example.com', 'password_hash': 'x'}])
+    for start in range(0, n, 50000):
+        batch = range(start, min(start + 50000, n))
+        db.session.execute(insert(Expense), [{'amount': i % 500 + 0.5, 'category': f'cat{i % 8}', 'date': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}', 'payment_method': 'Card', 'description': 'bench', 'user_id': 1} for i in batch])
+        db.session.execute(insert(Income), [{'amount': 1000.0, 'source': 'Salary', 'date': f'2024-{i % 12 + 1:02d}-01', 'user_id': 1} for i in batch[:len(batch) // 10]])
+    db.session.commit()
+
+
+# --- Old path (as routes.py did it before the Core read path) ---
+def orm_list():
+    exps = Expense.query.filter_by(user_id=1).order_by(Expense.date.desc()).all()
+    return [{'id': e.id, 'amount': e.amount, 'category': e.category, 'date': e.date, 'description': e.description} for e in exps]
+
+def orm_csv():
+    incomes = Income.query.filter_by(user_id=1).order_by(Income.date.desc()).all()
+    expenses = Expense.query.filter_by(user_id=1).order_by(Expense.date.desc()).all()
+    all_txns = []
+    for i in incomes: all_txns.append({'date': i.date, 'type': 'INCOME', 'cat': i.source, 'desc': '-', 'method': 'N/A', 'amt': i.amount})
+    for e in expenses: all_txns.append({'date': e.date, 'type': 'EXPENSE', 'cat': e.category, 'desc': e.description or '-', 'method': e.payment_method or 'Cash', 'amt': e.amount})
+    all_txns.sort(key=lambda x: x['date'], reverse=True)
+    cw = csv.writer(io.StringIO())
+    for t in all_txns: cw.writerow([t['date'], t['type'], t['cat'], t['desc'], t['method'], t['amt']])
+
+# --- New path ---
+def core_list():
+    return to_json_list(expense_rows(1), EXPENSE_COLS)
+
+def core_csv():
+    csv.writer(io.StringIO()).writerows(ledger_rows(1))
+
+
+def measure(fn, n):
+    db.session.expunge_all()  # Fresh identity map for each run
+    tracemalloc.start()
+    started = time.process_time()
+    fn()
+    cpu = time.process_time() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu / n * 1e6, peak / n
+
+
+def main(sizes):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    print(f"{'rows':>9} {'path':<10} {'ORM us/row':>11} {'Core us/row':>12} {'ORM B/row':>10} {'Core B/row':>11}")
+    for n in sizes:
+        with app.app_context():
+            db.create_all()
+            seed(n)
+            for name, old, new in (('list', orm_list, core_list), ('csv', orm_csv, core_csv)):
+                orm_cpu, orm_mem = measure(old, n)
+                core_cpu, core_mem = measure(new, n)
+                print(f"{n:>9} {name:<10} {orm_cpu:>11.2f} {core_cpu:>12.2f} {orm_mem:>10.0f} {core_mem:>11.0f}")
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == '__main__':
+    main([int(a) for a in sys.argv[1:]] or [10000, 100000, 1000000])
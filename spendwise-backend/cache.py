@@ -0,0 +1,229 @@
+import time
+import datetime
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import request, make_response, current_app
+
+# ==========================================
+# RESULT CACHE (Shared across gunicorn workers when a shared backend is configured)
+# ==========================================
+# Keys look like: "sw:<endpoint>:<user_id>:<generation>:<args>"
+# Every write route bumps the user's generation, so old entries simply stop being read
+# and age out through the TTL / LRU instead of being deleted one by one.
+# NOTE: with the local backend the generation lives in each worker's memory, so a write
+# only invalidates the worker that handled it. That is why caching is off by default
+# unless CACHE_BACKEND='redis', and local entries never live longer than CACHE_LOCAL_MAX_TTL.
+
+class LocalLRUBackend:
+    """In-process LRU store. Default backend, also the stand-in for a shared one in tests."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._counters = {}  # Kept outside the LRU so generations are never evicted
+        self._locks = {}  # add() keys, also outside the LRU so they don't cost cached results
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            store = self._data if key in self._data else self._locks
+            item = store.get(key)
+            if item is None: return None
+            value, expires_at = item
+            if expires_at and expires_at < time.time():
+                del store[key]
+                return None
+            if store is self._data: self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def add(self, key, value, ttl):
+        # Set only if missing (used as the stampede lock)
+        with self._lock:
+            item = self._locks.get(key)
+            if item is not None and not (item[1] and item[1] < time.time()):
+                return False
+            self._locks[key] = (value, time.time() + ttl if ttl else None)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._locks.pop(key, None)
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+            return self._counters[key]
+
+    def get_counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+            self._locks.clear()
+
+
+class RedisBackend:
+    """Shared backend for multiple workers/nodes. Needs the optional 'redis' package."""
+
+    def __init__(self, url):
+        import redis  # Optional dependency, only needed when CACHE_BACKEND='redis'
+        self.client = redis.Redis.from_url(url)
+
+    @property
+    def evictions(self):
+        # Server-wide count, Redis does its own eviction (maxmemory-policy)
+        return int(self.client.info('stats').get('evicted_keys', 0))
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=ttl or None)
+
+    def add(self, key, value, ttl):
+        return bool(self.client.set(key, value, ex=ttl or None, nx=True))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def incr(self, key, amount=1):
+        return self.client.incr(key, amount)
+
+    def get_counter(self, key):
+        return int(self.client.get(key) or 0)
+
+    def clear(self):
+        for key in self.client.scan_iter('sw:*'):
+            self.client.delete(key)
+
+
+class ResultCache:
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.default_ttl = 300
+        self.lock_timeout = 10
+        self.enabled = True
+
+    def init_app(self, app):
+        self.default_ttl = app.config.get('CACHE_TTL', 300)
+        self.lock_timeout = app.config.get('CACHE_LOCK_TIMEOUT', 10)
+        self.enabled = app.config.get('CACHE_ENABLED', True)
+        if self.backend is None:
+            if app.config.get('CACHE_BACKEND') == 'redis':
+                self.backend = RedisBackend(app.config['CACHE_REDIS_URL'])
+            else:
+                self.backend = LocalLRUBackend(app.config.get('CACHE_MAX_ENTRIES', 1024))
+        if isinstance(self.backend, LocalLRUBackend):
+            # Other workers won't see this worker's invalidations, keep their staleness short
+            self.default_ttl = min(self.default_ttl, app.config.get('CACHE_LOCAL_MAX_TTL', 30))
+        app.extensions['result_cache'] = self
+
+    @property
+    def shared(self):
+        return not isinstance(self.backend, LocalLRUBackend)
+
+    def count(self, name, amount=1):
+        # Counters live in the backend so every worker reports the same totals (when shared)
+        self.backend.incr(f"sw:stats:{name}", amount)
+
+    def counter(self, name):
+        return self.backend.get_counter(f"sw:stats:{name}")
+
+    def _generation(self, user_id):
+        return self.backend.get_counter(f"sw:gen:{user_id}")
+
+    def make_key(self, endpoint, user_id, args=None):
+        arg_str = '&'.join(f"{k}={v}" for k, v in sorted((args or {}).items()))
+        return f"sw:{endpoint}:{user_id}:{self._generation(user_id)}:{arg_str}"
+
+    def invalidate_user(self, user_id):
+        self.backend.incr(f"sw:gen:{user_id}")
+
+    def get_or_compute(self, key, compute, ttl=None):
+        ttl = ttl or self.default_ttl
+        value = self.backend.get(key)
+        if value is not None:
+            self.count('hits')
+            return value
+        self.count('misses')
+
+        # Stampede protection: only the worker holding the lock recomputes a cold key,
+        # the others wait while the lock is held. If the lock goes away without a value
+        # (error response, or the holder died and the lock expired) they compute themselves.
+        lock_key = f"{key}:lock"
+        if not self.backend.add(lock_key, b'1', self.lock_timeout):
+            self.count('stampede_waits')
+            while self.backend.get(lock_key) is not None:
+                time.sleep(0.05)
+                value = self.backend.get(key)
+                if value is not None: return value
+            value = self.backend.get(key)
+            return value if value is not None else compute()
+        try:
+            value = compute()
+            if value is not None: self.backend.set(key, value, ttl)
+            return value
+        finally:
+            self.backend.delete(lock_key)
+
+    def stats(self):
+        data = {name: self.counter(name) for name in ('hits', 'misses', 'stampede_waits')}
+        lookups = data['hits'] + data['misses']
+        data['evictions'] = getattr(self.backend, 'evictions', 0)
+        data['hit_rate'] = round(data['hits'] / lookups * 100, 1) if lookups else 0
+        data['backend'] = type(self.backend).__name__
+        return data
+
+
+def cached_result(endpoint, ttl=None, per_day=False):
+    """Opt-in response cache for a token_required route. Place it BELOW @token_required.
+
+    per_day=True adds today's date to the key, for routes whose output depends on date.today().
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(current_user, *args, **kwargs):
+            cache = current_app.extensions['result_cache']
+            if not cache.enabled:
+                return f(current_user, *args, **kwargs)
+
+            computed = {}
+            def compute():
+                computed['resp'] = make_response(f(current_user, *args, **kwargs))
+                # Only successful responses are cached, errors are always recomputed
+                return computed['resp'].get_data() if computed['resp'].status_code == 200 else None
+
+            query_args = request.args.to_dict()
+            if per_day: query_args['_day'] = datetime.date.today().isoformat()
+            key = cache.make_key(endpoint, current_user.id, query_args)
+            body = cache.get_or_compute(key, compute, ttl)
+            if body is None:
+                return computed['resp']
+            return make_response(body, 200, {'Content-Type': 'application/json'})
+        return decorated
+    return decorator
+
+
+def invalidates_cache(f):
+    """Bumps the user's cache generation after a write (any non-GET request)."""
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        resp = f(current_user, *args, **kwargs)
+        if request.method != 'GET':
+            current_app.extensions['result_cache'].invalidate_user(current_user.id)
+        return resp
+    return decorated
@@ -18,10 +18,32 @@ class Config:
 
     # === EMAIL CONFIGURATION (SMTP) ===
     # Using Gmail settings by default
-    MAIL_SERVER = 'smtp.gmail.com'
-    MAIL_PORT = 587
-    MAIL_USE_TLS = True
+    # (Override MAIL_SERVER/MAIL_PORT/MAIL_USE_TLS in .env to point at a local SMTP stand-in)
+    MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
+    MAIL_PORT = int(os.getenv('MAIL_PORT', 587))
+    MAIL_USE_TLS = os.getenv('MAIL_USE_TLS', 'true').lower() == 'true'
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')  # Loaded from .env
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')  # Loaded from .env
     # This adds the professional name "SpendWise Team" to your emails
     MAIL_DEFAULT_SENDER = "SpendWise Team <spendwise64@gmail.com>"
+
+
+    # === RESULT CACHE (Analytics endpoints) ===
+    # 'local' = in-process LRU per worker, 'redis' = shared across workers/nodes (pip install redis)
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'local')
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    # Off by default for 'local': with several gunicorn workers, a write only invalidates the
+    # worker that handled it and the others serve stale analytics (up to CACHE_LOCAL_MAX_TTL).
+    # Set CACHE_ENABLED=true to opt in anyway (e.g. a single worker).
+    CACHE_ENABLED = os.getenv('CACHE_ENABLED', 'true' if CACHE_BACKEND == 'redis' else 'false').lower() == 'true'
+    CACHE_TTL = int(os.getenv('CACHE_TTL', 300))  # Seconds
+    CACHE_LOCAL_MAX_TTL = int(os.getenv('CACHE_LOCAL_MAX_TTL', 30))  # Seconds, cap for the 'local' backend
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+    CACHE_LOCK_TIMEOUT = 10  # Max seconds other workers wait for the one recomputing a cold key
+
+    # === DIGEST EMAILS (flask send-digest) ===
+    DIGEST_CHECKPOINT_FILE = os.getenv('DIGEST_CHECKPOINT_FILE', 'digest_checkpoint.json')
+
+    # === BUDGET / EMERGENCY FUND ALERTS ===
+    BUDGET_ALERT_LEVELS = (80, 100)  # % of the monthly category budget
+    ALERT_EMAILS_ENABLED = os.getenv('ALERT_EMAILS_ENABLED', 'false').lower() == 'true'
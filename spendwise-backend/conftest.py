@@ -0,0 +1,39 @@
+import os
+import pytest
+
+# Point the import-time app (app.py) at a throwaway database before anything loads config
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from config import Config
+from app import create_app
+from extensions import result_cache
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'  # Fresh in-memory database per app
+    MAIL_SUPPRESS_SEND = True
+    CACHE_ENABLED = True
+
+
+@pytest.fixture
+def app(tmp_path):
+    TestConfig.DIGEST_CHECKPOINT_FILE = str(tmp_path / 'digest_checkpoint.json')
+    app = create_app(TestConfig)
+    result_cache.backend.clear()  # The cache extension (and its backend) is shared between apps
+    yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    """login('name') -> auth headers for a freshly registered user."""
+    def _login(username):
+        client.post('/auth/register', json={'username': username, 'email': f'{username}@x.com', 'password': 'pw'})
+        token = client.post('/auth/login', json={'username': username, 'password': 'pw'}).json['access_token']
+        return {'Authorization': f'Bearer {token}'}
+    return _login
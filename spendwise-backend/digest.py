@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import smtplib
+import datetime
+import click
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import func
+from models import db, User, Expense, Income, Budget, EmergencyFund
+from extensions import mail
+
+# ==========================================
+# PERIODIC DIGEST EMAIL (WEEKLY / MONTHLY)
+# ==========================================
+# Users are streamed in chunks ordered by id. Each chunk costs a fixed number of grouped
+# queries (not one /dashboard run per user) and is sent over a single SMTP connection.
+# After every chunk the last user id is saved, so a crashed run can pick up where it stopped.
+# A rejected recipient (5xx for that message) is recorded in failed_ids and skipped. A connection
+# problem is retried with backoff; if it persists the run stops before the first unsent user,
+# and the checkpoint never moves past it, so the next run resumes there.
+
+DIGEST_TEMPLATE = """Hi {username},
+
+Here is your SpendWise {period_name} summary ({start} to {end}).
+
+Total Income:   Rs. {income:.2f}
+Total Expenses: Rs. {expenses:.2f}
+Net Savings:    Rs. {net:.2f}
+
+Top Categories:
+{top_categories}
+
+Budget Alerts ({budget_month}):
+{overruns}
+
+Emergency Fund: Rs. {fund_current:.2f} of Rs. {fund_target:.2f} ({fund_progress}%)
+
+Keep tracking,
+SpendWise Team"""
+
+TOP_CATEGORY_COUNT = 3
+SEND_ATTEMPTS = 3  # SMTP connections tried per chunk before the run stops
+RETRY_BACKOFF = 2  # Seconds, doubled after every failed connection attempt
+
+
+def get_period(period, today=None):
+    """Returns (start, end) date strings for the last full week or last full month."""
+    today = today or datetime.date.today()
+    if period == 'weekly':
+        end = today - datetime.timedelta(days=1)
+        start = end - datetime.timedelta(days=6)
+    else:
+        end = today.replace(day=1) - datetime.timedelta(days=1)
+        start = end.replace(day=1)
+    return str(start), str(end)
+
+
+def load_chunk_stats(user_ids, start, end):
+    """All digest numbers for a chunk of users in 5 grouped queries."""
+    stats = {uid: {'income': 0, 'expenses': 0, 'categories': [], 'overruns': [], 'fund_current': 0, 'fund_target': 0} for uid in user_ids}
+    budget_month = end[:7]
+
+    # 1. Period totals
+    for uid, total in db.session.query(Income.user_id, func.sum(Income.amount)).filter(Income.user_id.in_(user_ids), Income.date >= start, Income.date <= end).group_by(Income.user_id):
+        stats[uid]['income'] = total or 0
+    for uid, total in db.session.query(Expense.user_id, func.sum(Expense.amount)).filter(Expense.user_id.in_(user_ids), Expense.date >= start, Expense.date <= end).group_by(Expense.user_id):
+        stats[uid]['expenses'] = total or 0
+
+    # 2. Category totals (top N picked per user below, rows already sorted by amount)
+    cat_rows = db.session.query(Expense.user_id, Expense.category, func.sum(Expense.amount).label('total')).filter(Expense.user_id.in_(user_ids), Expense.date >= start, Expense.date <= end).group_by(Expense.user_id, Expense.category).order_by(Expense.user_id, func.sum(Expense.amount).desc())
+    for uid, category, total in cat_rows:
+        if len(stats[uid]['categories']) < TOP_CATEGORY_COUNT:
+            stats[uid]['categories'].append((category, total))
+
+    # 3. Budget overruns (month-to-date spend of the month the period ends in)
+    spent = db.session.query(Expense.user_id, Expense.category, func.sum(Expense.amount).label('spent')).filter(Expense.user_id.in_(user_ids), Expense.date >= f"{budget_month}-01", Expense.date <= end).group_by(Expense.user_id, Expense.category).subquery()
+    overrun_rows = db.session.query(Budget.user_id, Budget.category, Budget.amount, spent.c.spent).join(spent, (spent.c.user_id == Budget.user_id) & (spent.c.category == Budget.category)).filter(Budget.user_id.in_(user_ids), Budget.month == budget_month, spent.c.spent > Budget.amount)
+    for uid, category, budgeted, actual in overrun_rows:
+        stats[uid]['overruns'].append((category, budgeted, actual))
+
+    # 4. Emergency fund progress
+    for uid, current, target in db.session.query(EmergencyFund.user_id, EmergencyFund.current_amount, EmergencyFund.target_amount).filter(EmergencyFund.user_id.in_(user_ids)):
+        stats[uid]['fund_current'] = current or 0
+        stats[uid]['fund_target'] = target or 0
+
+    return stats
+
+
+def render_digest(username, s, period, start, end):
+    top = '\n'.join(f"  - {c}: Rs. {a:.2f}" for c, a in s['categories']) or "  - No expenses recorded"
+    overruns = '\n'.join(f"  - {c}: spent Rs. {a:.2f} of Rs. {b:.2f}" for c, b, a in s['overruns']) or "  - All budgets on track"
+    return DIGEST_TEMPLATE.format(
+        username=username, period_name=period, start=start, end=end,
+        income=s['income'], expenses=s['expenses'], net=s['income'] - s['expenses'],
+        top_categories=top, budget_month=end[:7], overruns=overruns,
+        fund_current=s['fund_current'], fund_target=s['fund_target'],
+        fund_progress=round(s['fund_current'] / s['fund_target'] * 100, 1) if s['fund_target'] > 0 else 0
+    )
+
+
+def load_checkpoint(path, run_key):
+    if not os.path.exists(path): return 0
+    with open(path) as fh:
+        data = json.load(fh)
+    # A checkpoint from another period/run is ignored, that run is finished or abandoned
+    return data.get('last_user_id', 0) if data.get('run_key') == run_key else 0
+
+
+def save_checkpoint(path, run_key, last_user_id):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as fh:
+        json.dump({'run_key': run_key, 'last_user_id': last_user_id}, fh)
+    os.replace(tmp_path, path)
+
+
+def is_permanent_failure(e):
+    """True for a 5xx about this one message (bad recipient etc.), retrying won't help."""
+    if isinstance(e, smtplib.SMTPRecipientsRefused): return True
+    # A refused sender or bad login fails every message the same way: treat it as connection-level
+    if isinstance(e, (smtplib.SMTPSenderRefused, smtplib.SMTPAuthenticationError)): return False
+    return isinstance(e, smtplib.SMTPResponseException) and e.smtp_code >= 500
+
+
+def send_chunk(messages):
+    """Sends [(user_id, Message)] in order, reconnecting on connection errors.
+
+    Returns (done, sent, failed_ids): done counts messages sent or permanently rejected,
+    so messages[done:] are the ones still unsent when the connection kept failing.
+    """
+    done, sent, failed_ids = 0, 0, []
+    for attempt in range(SEND_ATTEMPTS):
+        if attempt: time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+        try:
+            with mail.connect() as conn:  # One SMTP session per chunk (new one after a failure)
+                while done < len(messages):
+                    user_id, msg = messages[done]
+                    try:
+                        conn.send(msg)
+                        sent += 1
+                    except Exception as e:
+                        if not is_permanent_failure(e): raise
+                        print(f"Digest Email Rejected (user {user_id}): {e}")
+                        failed_ids.append(user_id)
+                    done += 1
+            return done, sent, failed_ids
+        except Exception as e:
+            if done == len(messages): break  # Everything went out, only closing the session failed
+            print(f"Digest Email Error (user {messages[done][0]}, attempt {attempt + 1}): {e}")
+    return done, sent, failed_ids
+
+
+def send_digests(period='weekly', chunk_size=500, checkpoint_path=None, resume=True, today=None):
+    """Sends the digest to every user. Returns a dict with counts and users-per-second."""
+    start, end = get_period(period, today)
+    run_key = f"{period}:{start}:{end}"
+    checkpoint_path = checkpoint_path or current_app.config['DIGEST_CHECKPOINT_FILE']
+    last_id = load_checkpoint(checkpoint_path, run_key) if resume else 0
+
+    sent, failed_ids, unsent_ids = 0, [], []
+    started = time.perf_counter()
+    while True:
+        # Keyset pagination: stable and cheap no matter how deep into the table we are
+        users = db.session.query(User.id, User.username, User.email).filter(User.id > last_id).order_by(User.id).limit(chunk_size).all()
+        if not users: break
+
+        stats = load_chunk_stats([u.id for u in users], start, end)
+        subject = f"Your SpendWise {period.capitalize()} Summary"
+        messages = []
+        for u in users:
+            msg = Message(subject, recipients=[u.email])
+            msg.body = render_digest(u.username, stats[u.id], period, start, end)
+            messages.append((u.id, msg))
+
+        done, chunk_sent, chunk_failed = send_chunk(messages)
+        sent += chunk_sent
+        failed_ids += chunk_failed
+        if done:
+            last_id = users[done - 1].id
+            save_checkpoint(checkpoint_path, run_key, last_id)
+        db.session.expire_all()
+        if done < len(users):
+            # Stop here so the next (resumed) run retries from the first unsent user
+            unsent_ids = [uid for uid, _ in messages[done:]]
+            break
+
+    elapsed = time.perf_counter() - started
+    return {'period': run_key, 'sent': sent, 'failed_ids': failed_ids, 'unsent_ids': unsent_ids, 'seconds': round(elapsed, 2), 'users_per_second': round(sent / elapsed, 1) if elapsed > 0 else 0}
+
+
+@click.command('send-digest')
+@click.option('--period', type=click.Choice(['weekly', 'monthly']), default='weekly')
+@click.option('--chunk-size', default=500, show_default=True)
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint and start from the first user.')
+def send_digest_command(period, chunk_size, restart):
+    """Email every user their spending summary. Point MAIL_SERVER/MAIL_PORT at a local SMTP stand-in to benchmark."""
+    result = send_digests(period, chunk_size, resume=not restart)
+    click.echo(f"Sent {result['sent']} digests for {result['period']} in {result['seconds']}s ({result['users_per_second']} users/sec)")
+    if result['failed_ids']:
+        click.echo(f"Rejected by the mail server (skipped): users {result['failed_ids']}")
+    if result['unsent_ids']:
+        raise click.ClickException(f"Stopped at user {result['unsent_ids'][0]}, {len(result['unsent_ids'])} users in that chunk were not sent. Run again to resume.")
@@ -1,4 +1,8 @@
 from flask_mail import Mail
+from cache import ResultCache
 
 # Initialize Mail here so it can be shared across files
-mail = Mail()
\ No newline at end of file
+mail = Mail()
+
+# Computed-result cache for the analytics endpoints (see cache.py)
+result_cache = ResultCache()
\ No newline at end of file
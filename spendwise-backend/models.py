@@ -72,4 +72,22 @@ class Feedback(db.Model):
     user_username = db.Column(db.String(80))
     rating = db.Column(db.Integer)
     message = db.Column(db.Text)
-    date = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    date = db.Column(db.DateTime, default=datetime.utcnow)
+
+# 8. Running Spend Totals (per user / month / category, kept up to date on write for alerts)
+class SpendingTotal(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    month = db.Column(db.String(7), nullable=False) # YYYY-MM
+    category = db.Column(db.String(50), nullable=False)
+    total = db.Column(db.Float, default=0.0)
+    __table_args__ = (db.UniqueConstraint('user_id', 'month', 'category'),)
+
+# 9. Notifications Table (Budget / Emergency Fund alerts)
+class Notification(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    kind = db.Column(db.String(30), nullable=False) # budget_80, budget_100, fund_low
+    message = db.Column(db.String(255), nullable=False)
+    is_read = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
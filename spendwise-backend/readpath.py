@@ -0,0 +1,63 @@
+import heapq
+from sqlalchemy import select, func
+from models import db, User, Expense, Income, RecurringExpense
+
+# ==========================================
+# READ PATH (Core selects, no ORM objects)
+# ==========================================
+# List and export endpoints only copy columns out, so they skip the ORM entirely:
+# each query selects just the needed columns and yields lightweight tuple rows
+# (no identity map, no change tracking), which go straight into JSON / CSV / PDF.
+
+EXPENSE_COLS = ('id', 'amount', 'category', 'date', 'description')
+INCOME_COLS = ('id', 'amount', 'source', 'date')
+RECURRING_COLS = ('id', 'description', 'amount', 'next_due_date', 'frequency')
+USER_COLS = ('id', 'username', 'email', 'user_type', 'joined', 'is_admin')
+
+
+def _rows(stmt):
+    return db.session.execute(stmt)
+
+
+def to_json_list(rows, cols):
+    return [dict(zip(cols, r)) for r in rows]
+
+
+def expense_rows(user_id):
+    return _rows(select(Expense.id, Expense.amount, Expense.category, Expense.date, Expense.description).where(Expense.user_id == user_id).order_by(Expense.date.desc()))
+
+
+def income_rows(user_id):
+    return _rows(select(Income.id, Income.amount, Income.source, Income.date).where(Income.user_id == user_id).order_by(Income.date.desc()))
+
+
+def recurring_rows(user_id):
+    return _rows(select(RecurringExpense.id, RecurringExpense.description, RecurringExpense.amount, RecurringExpense.next_due_date, RecurringExpense.frequency).where(RecurringExpense.user_id == user_id))
+
+
+def user_rows(limit=20):
+    for r in _rows(select(User.id, User.username, User.email, User.user_type, User.joined_at, User.is_admin).limit(limit)):
+        yield (r[0], r[1], r[2], r[3], r[4].strftime('%Y-%m-%d'), r[5])
+
+
+def monthly_totals(user_id):
+    """{'YYYY-MM': {'income': x, 'expense': y}} grouped in the database (no per-row loop)."""
+    monthly_map = {}
+    for model, key in ((Income, 'income'), (Expense, 'expense')):
+        month = func.substr(model.date, 1, 7).label('month')
+        for m, total in _rows(select(month, func.sum(model.amount)).where(model.user_id == user_id).group_by(month)):
+            monthly_map.setdefault(m, {'income': 0, 'expense': 0})[key] = total or 0
+    return monthly_map
+
+
+def ledger_rows(user_id):
+    """Every transaction, newest first, as (date, type, category, description, payment_method, amount).
+
+    Both queries are already sorted by date, so they are merged lazily instead of
+    collected and re-sorted (ties keep income first, same as the old stable sort).
+    """
+    incomes = _rows(select(Income.date, Income.source, Income.amount).where(Income.user_id == user_id).order_by(Income.date.desc()))
+    expenses = _rows(select(Expense.date, Expense.category, Expense.description, Expense.payment_method, Expense.amount).where(Expense.user_id == user_id).order_by(Expense.date.desc()))
+    inc_iter = ((d, 'INCOME', src, '-', 'N/A', amt) for d, src, amt in incomes)
+    exp_iter = ((d, 'EXPENSE', cat, desc or '-', method or 'Cash', amt) for d, cat, desc, method, amt in expenses)
+    return heapq.merge(inc_iter, exp_iter, key=lambda t: t[0], reverse=True)
@@ -2,10 +2,13 @@ import csv
 import io
 from flask import send_file, make_response
 from flask import Blueprint, request, jsonify, current_app
-from models import db, User, Expense, Income, Budget, RecurringExpense, EmergencyFund, Feedback
+from models import db, User, Expense, Income, Budget, RecurringExpense, EmergencyFund, Feedback, SpendingTotal, Notification
 from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy import func, extract
-from extensions import mail
+from extensions import mail, result_cache
+from cache import cached_result, invalidates_cache
+from alerts import record_expense, check_budget, check_fund, alert_stats
+from readpath import to_json_list, expense_rows, income_rows, recurring_rows, user_rows, monthly_totals, ledger_rows, EXPENSE_COLS, INCOME_COLS, RECURRING_COLS, USER_COLS
 from flask_mail import Message
 import jwt
 import datetime
@@ -32,6 +35,12 @@ def send_async_email(subject, recipient, body):
     thr = Thread(target=send_email_thread, args=(app, msg))
     thr.start()
 
+def send_alert_emails(user, alerts):
+    # Optional: alerts are always stored in Notifications, email is opt-in via ALERT_EMAILS_ENABLED
+    if not current_app.config.get('ALERT_EMAILS_ENABLED'): return
+    for a in alerts:
+        send_async_email("SpendWise Alert", user.email, f"Hi {user.username},\n\n{a.message}")
+
 def send_email_thread(app, msg):
     with app.app_context():
         try:
@@ -182,6 +191,7 @@ def get_dashboard_data(current_user):
 
 @main.route('/analytics/monthly', methods=['GET'])
 @token_required
+@cached_result('analytics_monthly', per_day=True)
 def get_monthly_trends(current_user):
     incomes = db.session.query(func.substr(Income.date, 1, 7).label('month'), func.sum(Income.amount)).filter_by(user_id=current_user.id).group_by('month').all()
     expenses = db.session.query(func.substr(Expense.date, 1, 7).label('month'), func.sum(Expense.amount)).filter_by(user_id=current_user.id).group_by('month').all()
@@ -226,36 +236,42 @@ def get_monthly_trends(current_user):
 
 @main.route('/expenses', methods=['GET', 'POST'])
 @token_required
+@invalidates_cache
 def handle_expenses(current_user):
     if request.method == 'POST':
         data = request.get_json()
+        alerts = record_expense(current_user.id, data['category'], data['date'], data['amount'])
         db.session.add(Expense(amount=data['amount'], category=data['category'], date=data['date'], payment_method=data.get('payment_method'), description=data.get('description'), user_id=current_user.id))
         db.session.commit()
-        return jsonify({'message': 'Expense added'}), 201
-    exps = Expense.query.filter_by(user_id=current_user.id).order_by(Expense.date.desc()).all()
-    return jsonify([{'id': e.id, 'amount': e.amount, 'category': e.category, 'date': e.date, 'description': e.description} for e in exps])
+        send_alert_emails(current_user, alerts)
+        return jsonify({'message': 'Expense added', 'alerts': [a.message for a in alerts]}), 201
+    return jsonify(to_json_list(expense_rows(current_user.id), EXPENSE_COLS))
 
 @main.route('/expenses/<int:id>', methods=['DELETE'])
 @token_required
+@invalidates_cache
 def delete_expense(current_user, id):
     exp = Expense.query.filter_by(id=id, user_id=current_user.id).first()
-    if exp: db.session.delete(exp); db.session.commit()
+    if exp:
+        record_expense(current_user.id, exp.category, exp.date, -exp.amount)
+        db.session.delete(exp); db.session.commit()
     return jsonify({'message': 'Deleted'})
 
 @main.route('/income', methods=['GET', 'POST'])
 @token_required
+@invalidates_cache
 def handle_income(current_user):
     if request.method == 'POST':
         data = request.get_json()
         db.session.add(Income(amount=data['amount'], source=data['source'], date=data['date'], user_id=current_user.id))
         db.session.commit()
         return jsonify({'message': 'Income added'}), 201
-    incs = Income.query.filter_by(user_id=current_user.id).order_by(Income.date.desc()).all()
-    return jsonify([{'id': i.id, 'amount': i.amount, 'source': i.source, 'date': i.date} for i in incs])
+    return jsonify(to_json_list(income_rows(current_user.id), INCOME_COLS))
 
 # --- NEW: DELETE INCOME ROUTE ---
 @main.route('/income/<int:id>', methods=['DELETE'])
 @token_required
+@invalidates_cache
 def delete_income(current_user, id):
     inc = Income.query.filter_by(id=id, user_id=current_user.id).first()
     if inc: 
@@ -266,14 +282,17 @@ def delete_income(current_user, id):
 
 @main.route('/budget', methods=['GET', 'POST'])
 @token_required
+@invalidates_cache
 def handle_budget(current_user):
     if request.method == 'POST':
         data = request.get_json()
         existing = Budget.query.filter_by(user_id=current_user.id, category=data['category'], month=data['month']).first()
+        alerts = check_budget(current_user.id, data['category'], data['month'], existing.amount if existing else None, data['amount'])
         if existing: existing.amount = data['amount']
         else: db.session.add(Budget(category=data['category'], amount=data['amount'], month=data['month'], user_id=current_user.id))
         db.session.commit()
-        return jsonify({'message': 'Budget set'}), 201
+        send_alert_emails(current_user, alerts)
+        return jsonify({'message': 'Budget set', 'alerts': [a.message for a in alerts]}), 201
     month = request.args.get('month', datetime.datetime.now().strftime('%Y-%m'))
     buds = Budget.query.filter_by(user_id=current_user.id, month=month).all()
     return jsonify([{'category': b.category, 'amount': b.amount, 'month': b.month} for b in buds])
@@ -292,6 +311,7 @@ def budget_analysis(current_user):
 @main.route('/recurring', methods=['GET', 'POST', 'DELETE'])
 @main.route('/recurring/<int:id>', methods=['DELETE'])
 @token_required
+@invalidates_cache
 def handle_recurring(current_user, id=None):
     if request.method == 'POST':
         data = request.get_json()
@@ -301,8 +321,7 @@ def handle_recurring(current_user, id=None):
         rec = RecurringExpense.query.filter_by(id=id, user_id=current_user.id).first()
         if rec: db.session.delete(rec); db.session.commit()
         return jsonify({'message': 'Deleted'})
-    recs = RecurringExpense.query.filter_by(user_id=current_user.id).all()
-    return jsonify([{'id': r.id, 'description': r.description, 'amount': r.amount, 'next_due_date': r.next_due_date, 'frequency': r.frequency} for r in recs])
+    return jsonify(to_json_list(recurring_rows(current_user.id), RECURRING_COLS))
 
 # ==========================================
 # 5. OTHER FEATURES
@@ -310,15 +329,32 @@ def handle_recurring(current_user, id=None):
 
 @main.route('/emergency-fund', methods=['GET', 'PUT'])
 @token_required
+@invalidates_cache
 def handle_fund(current_user):
     fund = EmergencyFund.query.filter_by(user_id=current_user.id).first()
     if not fund: fund = EmergencyFund(user_id=current_user.id); db.session.add(fund); db.session.commit()
     if request.method == 'PUT':
         data = request.get_json()
+        old_current, old_threshold = fund.current_amount, fund.alert_threshold
         for k, v in data.items(): setattr(fund, k, v)
-        db.session.commit(); return jsonify({'message': 'Fund updated'})
+        alerts = check_fund(fund, old_current, old_threshold)
+        db.session.commit()
+        send_alert_emails(current_user, alerts)
+        return jsonify({'message': 'Fund updated', 'alerts': [a.message for a in alerts]})
     return jsonify({'target_amount': fund.target_amount, 'current_amount': fund.current_amount, 'alert_threshold': fund.alert_threshold, 'monthly_goal': fund.monthly_goal, 'progress_percentage': round((fund.current_amount/fund.target_amount*100), 1) if fund.target_amount > 0 else 0})
 
+@main.route('/notifications', methods=['GET', 'PUT'])
+@token_required
+def handle_notifications(current_user):
+    if request.method == 'PUT':
+        # Mark all as read
+        Notification.query.filter_by(user_id=current_user.id, is_read=False).update({'is_read': True})
+        db.session.commit(); return jsonify({'message': 'Notifications marked as read'})
+    query = Notification.query.filter_by(user_id=current_user.id)
+    if request.args.get('unread') == '1': query = query.filter_by(is_read=False)
+    notes = query.order_by(Notification.id.desc()).limit(20).all()
+    return jsonify([{'id': n.id, 'kind': n.kind, 'message': n.message, 'is_read': n.is_read, 'date': n.created_at.strftime('%Y-%m-%d %H:%M')} for n in notes])
+
 @main.route('/user/profile', methods=['PUT'])
 @token_required
 def update_profile(current_user):
@@ -356,7 +392,7 @@ def admin_stats(current_user):
 @token_required
 def admin_users(current_user):
     if not current_user.is_admin: return jsonify({'error': 'Unauthorized'}), 403
-    return jsonify([{'id': u.id, 'username': u.username, 'email': u.email, 'user_type': u.user_type, 'joined': u.joined_at.strftime('%Y-%m-%d'), 'is_admin': u.is_admin} for u in User.query.limit(20).all()])
+    return jsonify(to_json_list(user_rows(20), USER_COLS))
 
 # --- NEW: DELETE USER ROUTE ---
 @main.route('/admin/users/<int:user_id>', methods=['DELETE'])
@@ -374,12 +410,28 @@ def delete_user(current_user, user_id):
         Budget.query.filter_by(user_id=user_id).delete()
         RecurringExpense.query.filter_by(user_id=user_id).delete()
         EmergencyFund.query.filter_by(user_id=user_id).delete()
+        SpendingTotal.query.filter_by(user_id=user_id).delete()
+        Notification.query.filter_by(user_id=user_id).delete()
         
         db.session.delete(user_to_delete)
         db.session.commit()
+        result_cache.invalidate_user(user_id)
         return jsonify({'message': 'User deleted'})
     return jsonify({'error': 'User not found'}), 404
 
+@main.route('/admin/cache-stats', methods=['GET'])
+@token_required
+def admin_cache_stats(current_user):
+    if not current_user.is_admin: return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify(result_cache.stats())
+
+@main.route('/admin/alert-stats', methods=['GET'])
+@token_required
+def admin_alert_stats(current_user):
+    if not current_user.is_admin: return jsonify({'error': 'Unauthorized'}), 403
+    # Write-path latency added by alert evaluation (should stay flat as data grows)
+    return jsonify(alert_stats())
+
 @main.route('/admin/feedback', methods=['GET'])
 @token_required
 def admin_feedback(current_user):
@@ -393,27 +445,14 @@ def admin_feedback(current_user):
 @token_required
 def export_data(current_user, format_type):
     try:
-        # 1. Fetch ALL Data
-        incomes = Income.query.filter_by(user_id=current_user.id).order_by(Income.date.desc()).all()
-        expenses = Expense.query.filter_by(user_id=current_user.id).order_by(Expense.date.desc()).all()
-        
+        # 1. MONTHLY BREAKDOWN DATA (Grouped in the DB, transactions are streamed later)
+        monthly_map = monthly_totals(current_user.id)
+
         # 2. Lifetime Totals
-        total_inc = sum(i.amount for i in incomes)
-        total_exp = sum(e.amount for e in expenses)
+        total_inc = sum(d['income'] for d in monthly_map.values())
+        total_exp = sum(d['expense'] for d in monthly_map.values())
         net_savings = total_inc - total_exp
 
-        # 3. PREPARE MONTHLY BREAKDOWN DATA
-        monthly_map = {}
-        for i in incomes:
-            m = i.date[:7] # Get "YYYY-MM"
-            if m not in monthly_map: monthly_map[m] = {'income': 0, 'expense': 0}
-            monthly_map[m]['income'] += i.amount
-
-        for e in expenses:
-            m = e.date[:7]
-            if m not in monthly_map: monthly_map[m] = {'income': 0, 'expense': 0}
-            monthly_map[m]['expense'] += e.amount
-        
         # Sort months descending (Newest first)
         sorted_months = sorted(monthly_map.keys(), reverse=True)
 
@@ -457,15 +496,8 @@ def export_data(current_user, format_type):
             cw.writerow(['--- TRANSACTION LEDGER ---'])
             cw.writerow(['Date', 'Type', 'Category', 'Description', 'Payment Method', 'Amount'])
             
-            # Combine & Sort
-            all_txns = []
-            for i in incomes: all_txns.append({'date': i.date, 'type': 'INCOME', 'cat': i.source, 'desc': '-', 'method': 'N/A', 'amt': i.amount})
-            for e in expenses: all_txns.append({'date': e.date, 'type': 'EXPENSE', 'cat': e.category, 'desc': e.description or '-', 'method': e.payment_method or 'Cash', 'amt': e.amount})
-            
-            all_txns.sort(key=lambda x: x['date'], reverse=True)
-            
-            for t in all_txns:
-                cw.writerow([t['date'], t['type'], t['cat'], t['desc'], t['method'], t['amt']])
+            # Rows come out already merged & sorted (Newest first)
+            cw.writerows(ledger_rows(current_user.id))
             
             output = make_response(si.getvalue())
             output.headers["Content-Disposition"] = "attachment; filename=spendwise_report.csv"
@@ -525,15 +557,10 @@ def export_data(current_user, format_type):
             # 4. Detailed Transactions
             elements.append(Paragraph("Transaction History", styles['Heading2']))
             
-            # Combine & Sort Data
+            # Rows come out already merged & sorted (Newest first)
             table_data = [['Date', 'Type', 'Category', 'Amount']]
-            all_txns = []
-            for i in incomes: all_txns.append({'date': i.date, 'type': 'Income', 'cat': i.source, 'amt': i.amount})
-            for e in expenses: all_txns.append({'date': e.date, 'type': 'Expense', 'cat': e.category, 'amt': e.amount})
-            all_txns.sort(key=lambda x: x['date'], reverse=True)
-
-            for t in all_txns:
-                table_data.append([t['date'], t['type'], t['cat'], f"Rs. {t['amt']}"])
+            for date, txn_type, cat, _, _, amt in ledger_rows(current_user.id):
+                table_data.append([date, txn_type.title(), cat, f"Rs. {amt}"])
 
             t_main = Table(table_data, colWidths=[1.5*inch, 1.5*inch, 3*inch, 1.5*inch])
             t_main.setStyle(TableStyle([
@@ -559,6 +586,7 @@ def export_data(current_user, format_type):
 # ==========================================
 @main.route('/analytics/overall', methods=['GET'])
 @token_required
+@cached_result('analytics_overall', per_day=True)
 def get_overall_analytics(current_user):
     try:
         # Lifetime Totals
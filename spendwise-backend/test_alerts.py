@@ -0,0 +1,137 @@
+import pytest
+from sqlalchemy.orm import Query
+import alerts
+from models import db, User, Expense, SpendingTotal, Notification
+
+MONTH = '2024-03'
+
+
+@pytest.fixture
+def headers(login):
+    return login('a')
+
+
+def add_expense(client, headers, amount, category='Food', date=f'{MONTH}-05'):
+    resp = client.post('/expenses', json={'amount': amount, 'category': category, 'date': date}, headers=headers)
+    assert resp.status_code == 201
+    return resp.json['alerts']
+
+
+def set_budget(client, headers, amount, category='Food'):
+    return client.post('/budget', json={'category': category, 'amount': amount, 'month': MONTH}, headers=headers).json['alerts']
+
+
+def kinds(app):
+    with app.app_context():
+        return [n.kind for n in Notification.query.order_by(Notification.id)]
+
+
+def running_total(app, category='Food'):
+    with app.app_context():
+        return SpendingTotal.query.filter_by(month=MONTH, category=category).one().total
+
+
+def test_levels_fire_once_per_crossing(app, client, headers):
+    set_budget(client, headers, 100)
+    assert add_expense(client, headers, 50) == []
+    assert len(add_expense(client, headers, 35)) == 1  # 85%
+    assert add_expense(client, headers, 10) == []  # Still above 80, below 100
+    assert len(add_expense(client, headers, 10)) == 1  # 105%
+    assert add_expense(client, headers, 5) == []
+    assert kinds(app) == ['budget_80', 'budget_100']
+
+
+def test_single_jump_fires_only_highest_level(app, client, headers):
+    set_budget(client, headers, 100)
+    assert len(add_expense(client, headers, 120)) == 1
+    assert kinds(app) == ['budget_100']
+
+
+def test_running_total_seeded_from_history(app, client, headers):
+    with app.app_context():
+        user_id = User.query.filter_by(username='a').one().id
+        db.session.add_all([Expense(user_id=user_id, amount=40, category='Food', date=f'{MONTH}-01'),
+                            Expense(user_id=user_id, amount=35, category='Food', date=f'{MONTH}-02'),
+                            Expense(user_id=user_id, amount=500, category='Food', date='2024-02-01')])  # Other month
+        db.session.commit()
+    # Setting the budget touches the total first; 75 is below 80%, so nothing fires yet
+    assert set_budget(client, headers, 100) == []
+    assert running_total(app) == 75
+    assert len(add_expense(client, headers, 10)) == 1
+    assert running_total(app) == 85
+
+
+def test_delete_moves_total_back_and_allows_recrossing(app, client, headers):
+    set_budget(client, headers, 100)
+    add_expense(client, headers, 50, date=f'{MONTH}-05')
+    add_expense(client, headers, 35, date=f'{MONTH}-06')
+    latest = client.get('/expenses', headers=headers).json[0]
+    assert latest['amount'] == 35
+    client.delete(f"/expenses/{latest['id']}", headers=headers)
+    assert running_total(app) == 50
+    assert len(add_expense(client, headers, 35)) == 1  # Back over 80%
+    assert kinds(app) == ['budget_80', 'budget_80']
+
+
+def test_budget_lowered_or_newly_set(app, client, headers):
+    add_expense(client, headers, 90)
+    assert set_budget(client, headers, 200) == []  # 45%
+    assert len(set_budget(client, headers, 100)) == 1  # 90%: crosses 80
+    assert len(set_budget(client, headers, 80)) == 1  # 112%: crosses 100
+    assert set_budget(client, headers, 85) == []  # Still over 100
+    assert len(set_budget(client, headers, 90, category='Travel')) == 0  # No spend there
+    add_expense(client, headers, 60, category='Rent')
+    assert len(set_budget(client, headers, 50, category='Rent')) == 1  # New budget, already over
+    assert kinds(app) == ['budget_80', 'budget_100', 'budget_100']
+
+
+def test_fund_fires_only_on_crossing(app, client, headers):
+    def put(**data):
+        return client.put('/emergency-fund', json=data, headers=headers).json['alerts']
+    assert put(target_amount='1000', current_amount='150', alert_threshold='100') == []
+    assert len(put(current_amount='50')) == 1
+    assert put(current_amount='40') == []  # Still below
+    assert put(current_amount='200') == []
+    assert len(put(current_amount='10')) == 1  # Crossed again
+    assert kinds(app) == ['fund_low', 'fund_low']
+
+
+def test_message_amounts_are_rounded(app, client, headers):
+    set_budget(client, headers, 36)
+    add_expense(client, headers, '10.1')
+    add_expense(client, headers, '10.1')
+    message = add_expense(client, headers, '10.1')[0]
+    assert 'Rs. 30.30 of Rs. 36.00' in message
+
+
+def test_concurrent_first_insert_reuses_existing_row(app, headers, monkeypatch):
+    with app.app_context():
+        user_id = User.query.filter_by(username='a').one().id
+        db.session.add(SpendingTotal(user_id=user_id, month=MONTH, category='Food', total=20))
+        db.session.commit()
+
+        # The first lookup misses the row, as if another request inserted it right after
+        real_first, calls = Query.first, []
+        def first(self):
+            calls.append(1)
+            return None if len(calls) == 1 else real_first(self)
+        monkeypatch.setattr(Query, 'first', first)
+
+        pending = Expense(user_id=user_id, amount=5, category='Food', date=f'{MONTH}-05')
+        db.session.add(pending)
+        row = alerts._running_total(user_id, MONTH, 'Food')
+        monkeypatch.setattr(Query, 'first', real_first)
+
+        assert row.total == 20  # Theirs, not a second seeded row
+        db.session.commit()  # Outer transaction survived the failed savepoint
+        assert SpendingTotal.query.count() == 1
+        assert Expense.query.count() == 1
+
+
+def test_alert_stats_count_evaluations(app, client, headers):
+    add_expense(client, headers, 10)
+    with app.app_context():
+        stats = alerts.alert_stats()
+    assert stats['evaluations'] == 1
+    assert sum(stats['latency_buckets'].values()) == 1
+    assert stats['scope'] == 'this worker only' and 'pid' in stats
@@ -0,0 +1,146 @@
+import time
+import threading
+from flask import jsonify
+from cache import ResultCache, LocalLRUBackend, cached_result
+from extensions import result_cache
+
+# Two ResultCache instances over one LocalLRUBackend = two gunicorn workers sharing a store.
+
+
+def make_workers(max_entries=1024):
+    backend = LocalLRUBackend(max_entries)
+    worker_a, worker_b = ResultCache(backend), ResultCache(backend)
+    for w in (worker_a, worker_b):
+        w.lock_timeout = 2
+    return backend, worker_a, worker_b
+
+
+def test_keys_are_scoped_by_user_and_args():
+    _, a, _ = make_workers()
+    assert a.make_key('analytics_overall', 1) != a.make_key('analytics_overall', 2)
+    assert a.make_key('analytics_overall', 1, {'month': '2024-01'}) != a.make_key('analytics_overall', 1, {'month': '2024-02'})
+    assert a.make_key('analytics_overall', 1) != a.make_key('analytics_monthly', 1)
+    # Argument order doesn't matter
+    assert a.make_key('x', 1, {'a': '1', 'b': '2'}) == a.make_key('x', 1, {'b': '2', 'a': '1'})
+
+
+def test_hit_is_shared_between_workers():
+    _, a, b = make_workers()
+    calls = []
+    compute = lambda: calls.append(1) or b'{"total": 1}'
+    assert a.get_or_compute(a.make_key('x', 1), compute) == b'{"total": 1}'
+    assert b.get_or_compute(b.make_key('x', 1), compute) == b'{"total": 1}'
+    assert len(calls) == 1
+    assert a.stats()['hits'] == 1 and b.stats()['misses'] == 1
+
+
+def test_invalidation_bumps_generation_for_every_worker():
+    _, a, b = make_workers()
+    a.get_or_compute(a.make_key('x', 1), lambda: b'old')
+    a.get_or_compute(a.make_key('x', 2), lambda: b'other user')
+    b.invalidate_user(1)
+    assert a.get_or_compute(a.make_key('x', 1), lambda: b'new') == b'new'
+    # Other users keep their entries
+    assert a.get_or_compute(a.make_key('x', 2), lambda: b'recomputed') == b'other user'
+
+
+def test_stampede_lock_computes_once():
+    _, a, b = make_workers()
+    key = a.make_key('x', 1)
+    started, release, calls, results = threading.Event(), threading.Event(), [], []
+
+    def slow_compute():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return b'value'
+
+    leader = threading.Thread(target=lambda: results.append(a.get_or_compute(key, slow_compute)))
+    leader.start()
+    started.wait(2)
+    waiter = threading.Thread(target=lambda: results.append(b.get_or_compute(key, slow_compute)))
+    waiter.start()
+    time.sleep(0.1)
+    release.set()
+    leader.join(); waiter.join()
+
+    assert results == [b'value', b'value']
+    assert len(calls) == 1
+    assert a.stats()['stampede_waits'] == 1
+
+
+def test_waiter_recomputes_as_soon_as_uncacheable_leader_finishes():
+    _, a, b = make_workers()
+    a.lock_timeout = b.lock_timeout = 10
+    key = a.make_key('x', 1)
+    started, release, results = threading.Event(), threading.Event(), []
+
+    def failing_compute():
+        started.set()
+        release.wait(2)
+        return None  # e.g. a 500 response, never cached
+
+    leader = threading.Thread(target=lambda: a.get_or_compute(key, failing_compute))
+    leader.start()
+    started.wait(2)
+    waiter = threading.Thread(target=lambda: results.append(b.get_or_compute(key, lambda: b'retry')))
+    began = time.time()
+    waiter.start()
+    time.sleep(0.1)
+    release.set()
+    leader.join(); waiter.join()
+
+    assert results == [b'retry']
+    assert time.time() - began < 2  # Not the full lock_timeout
+
+
+def test_lru_eviction_is_counted():
+    backend, a, _ = make_workers(max_entries=2)
+    for user_id in (1, 2, 3):
+        a.get_or_compute(a.make_key('x', user_id), lambda: b'v')
+    assert backend.evictions == 1
+    assert a.stats()['evictions'] == 1
+    # Oldest entry was the one evicted
+    assert a.get_or_compute(a.make_key('x', 1), lambda: b'recomputed') == b'recomputed'
+
+
+# --- Through the Flask app (cached_result / invalidates_cache) ---
+
+def test_route_hit_returns_cached_json(client, login):
+    headers = login('a')
+    first = client.get('/analytics/overall', headers=headers)
+    second = client.get('/analytics/overall', headers=headers)
+    assert second.status_code == 200
+    assert second.mimetype == 'application/json'
+    assert second.data == first.data
+    assert result_cache.stats()['hits'] == 1
+
+
+def test_non_200_response_is_not_cached(app, client, login):
+    from routes import token_required
+    calls = []
+
+    @token_required
+    @cached_result('flaky')
+    def flaky(current_user):
+        calls.append(1)
+        return (jsonify({'error': 'Analysis failed'}), 500) if len(calls) == 1 else jsonify({'ok': True})
+
+    app.add_url_rule('/test/flaky', 'flaky', flaky)
+    headers = login('a')
+    assert client.get('/test/flaky', headers=headers).status_code == 500
+    assert client.get('/test/flaky', headers=headers).json == {'ok': True}
+    assert client.get('/test/flaky', headers=headers).json == {'ok': True}
+    assert len(calls) == 2
+
+
+def test_only_writes_invalidate(client, login):
+    headers = login('a')
+    client.get('/analytics/overall', headers=headers)
+    client.get('/expenses', headers=headers)  # GET on a write route: no bump
+    client.get('/analytics/overall', headers=headers)
+    assert result_cache.stats()['hits'] == 1
+
+    client.post('/expenses', json={'amount': 40, 'category': 'Food', 'date': '2024-01-05'}, headers=headers)
+    assert client.get('/analytics/overall', headers=headers).json['total_expenses'] == 40
+    assert result_cache.stats()['hits'] == 1
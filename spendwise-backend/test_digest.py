@@ -0,0 +1,149 @@
+import json
+import datetime
+import smtplib
+import pytest
+import digest
+from models import db, User, Expense, Income, Budget, EmergencyFund
+
+# Weekly period for this "today" is 2024-03-03 .. 2024-03-09 (budgets checked for 2024-03)
+TODAY = datetime.date(2024, 3, 10)
+
+
+class FakeSMTP:
+    """Stand-in for mail.connect(): records sent messages and fails on demand."""
+
+    def __init__(self, reject=(), disconnect=(), disconnect_times=None):
+        self.outbox = []
+        self.connections = 0
+        self.reject = set(reject)  # Emails always refused (5xx per recipient)
+        self.disconnect = set(disconnect)  # Emails whose send drops the session
+        self.disconnect_times = disconnect_times  # None = every time, else only the first N drops
+
+    def __call__(self):
+        self.connections += 1
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send(self, msg):
+        email = msg.recipients[0]
+        if email in self.reject:
+            raise smtplib.SMTPRecipientsRefused({email: (550, b'No such user')})
+        if email in self.disconnect and (self.disconnect_times is None or self.disconnect_times > 0):
+            if self.disconnect_times: self.disconnect_times -= 1
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        self.outbox.append(msg)
+
+    def sent_to(self):
+        return [m.recipients[0] for m in self.outbox]
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    fake = FakeSMTP()
+    monkeypatch.setattr(digest.mail, 'connect', fake)
+    monkeypatch.setattr(digest, 'RETRY_BACKOFF', 0)
+    return fake
+
+
+@pytest.fixture
+def users(app):
+    with app.app_context():
+        people = [User(username=f'u{i}', email=f'u{i}@x.com', password_hash='x') for i in (1, 2, 3)]
+        db.session.add_all(people)
+        db.session.flush()
+        u1, u2, u3 = [u.id for u in people]
+        db.session.add_all([
+            EmergencyFund(user_id=u1, current_amount=250, target_amount=1000),
+            EmergencyFund(user_id=u2),
+            EmergencyFund(user_id=u3, current_amount=50, target_amount=100),
+            # u1: four categories in the period, plus spend before/after it
+            Expense(user_id=u1, amount=500, category='Rent', date='2024-03-04'),
+            Expense(user_id=u1, amount=50, category='Food', date='2024-03-05'),
+            Expense(user_id=u1, amount=20, category='Fun', date='2024-03-06'),
+            Expense(user_id=u1, amount=10, category='Travel', date='2024-03-07'),
+            Expense(user_id=u1, amount=30, category='Food', date='2024-03-01'),  # Month-to-date only
+            Expense(user_id=u1, amount=99, category='Food', date='2024-03-10'),  # After the period
+            Income(user_id=u1, amount=1000, source='Job', date='2024-03-05'),
+            Budget(user_id=u1, category='Food', amount=70, month='2024-03'),  # 80 spent: over
+            Budget(user_id=u1, category='Rent', amount=600, month='2024-03'),  # 500 spent: under
+            # u3: over a budget of another month only
+            Expense(user_id=u3, amount=40, category='Food', date='2024-03-08'),
+            Budget(user_id=u3, category='Food', amount=10, month='2024-02'),
+        ])
+        db.session.commit()
+        return u1, u2, u3
+
+
+def test_chunk_stats(app, users):
+    u1, u2, u3 = users
+    with app.app_context():
+        start, end = digest.get_period('weekly', TODAY)
+        stats = digest.load_chunk_stats([u1, u2, u3], start, end)
+
+    assert (start, end) == ('2024-03-03', '2024-03-09')
+    assert stats[u1]['income'] == 1000
+    assert stats[u1]['expenses'] == 580
+    assert stats[u1]['categories'] == [('Rent', 500), ('Food', 50), ('Fun', 20)]  # Top 3 only
+    assert stats[u1]['overruns'] == [('Food', 70, 80)]  # Month-to-date spend, not just the week
+    assert (stats[u1]['fund_current'], stats[u1]['fund_target']) == (250, 1000)
+    assert stats[u2] == {'income': 0, 'expenses': 0, 'categories': [], 'overruns': [], 'fund_current': 0, 'fund_target': 0}
+    assert stats[u3]['categories'] == [('Food', 40)]
+    assert stats[u3]['overruns'] == []
+
+
+def test_sends_every_user_across_chunks(app, users, smtp):
+    with app.app_context():
+        result = digest.send_digests('weekly', chunk_size=2, today=TODAY)
+
+    assert result['sent'] == 3 and result['failed_ids'] == [] and result['unsent_ids'] == []
+    assert smtp.sent_to() == ['u1@x.com', 'u2@x.com', 'u3@x.com']
+    assert smtp.connections == 2  # One SMTP session per chunk
+    body = smtp.outbox[0].body
+    assert 'Total Expenses: Rs. 580.00' in body
+    assert '  - Rent: Rs. 500.00' in body
+    assert '  - Food: spent Rs. 80.00 of Rs. 70.00' in body
+    assert 'Emergency Fund: Rs. 250.00 of Rs. 1000.00 (25.0%)' in body
+    assert '  - No expenses recorded' in smtp.outbox[1].body
+
+
+def test_resume_after_connection_failure(app, users, smtp):
+    u1, u2, u3 = users
+    smtp.disconnect = {'u2@x.com'}
+    with app.app_context():
+        first = digest.send_digests('weekly', chunk_size=2, today=TODAY)
+        checkpoint = json.load(open(app.config['DIGEST_CHECKPOINT_FILE']))
+        smtp.disconnect = set()  # Server is back
+        second = digest.send_digests('weekly', chunk_size=2, today=TODAY)
+
+    assert first['sent'] == 1 and first['unsent_ids'] == [u2]
+    assert smtp.connections >= digest.SEND_ATTEMPTS
+    assert checkpoint['last_user_id'] == u1
+    assert second['sent'] == 2 and second['unsent_ids'] == []
+    assert smtp.sent_to() == ['u1@x.com', 'u2@x.com', 'u3@x.com']
+
+
+def test_transient_disconnect_reconnects_within_run(app, users, smtp):
+    smtp.disconnect, smtp.disconnect_times = {'u2@x.com'}, 1
+    with app.app_context():
+        result = digest.send_digests('weekly', chunk_size=2, today=TODAY)
+
+    assert result['sent'] == 3 and result['unsent_ids'] == []
+    assert smtp.sent_to() == ['u1@x.com', 'u2@x.com', 'u3@x.com']
+
+
+def test_rejected_recipient_is_skipped_not_blocking(app, users, smtp):
+    u1, u2, u3 = users
+    smtp.reject = {'u2@x.com'}
+    with app.app_context():
+        first = digest.send_digests('weekly', chunk_size=2, today=TODAY)
+        second = digest.send_digests('weekly', chunk_size=2, today=TODAY)
+
+    assert first['sent'] == 2 and first['failed_ids'] == [u2] and first['unsent_ids'] == []
+    assert smtp.sent_to() == ['u1@x.com', 'u3@x.com']
+    # Checkpoint moved past the rejected user: nothing left to do for this period
+    assert second['sent'] == 0 and second['failed_ids'] == []